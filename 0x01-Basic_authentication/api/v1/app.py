@@ -6,14 +6,22 @@ from os import getenv
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
+from api.v1.auth.path_policy import PathPolicy
+from api.v1.compression import init_compression
+from api.v1.json_provider import FastJSONProvider
 import os
 
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
+init_compression(app)
 
 auth = None
+# Paths that don't require authentication, compiled once
+EXCLUDED_PATHS = PathPolicy(['/api/v1/status/',
+                             '/api/v1/unauthorized/', '/api/v1/forbidden/'])
 auth_type = getenv('AUTH_TYPE', None)
 
 # Initialize auth instance based on AUTH_TYPE
@@ -51,12 +59,8 @@ def before_request() -> str:
     if auth is None:
         return
 
-    # Define paths that don't require authentication
-    excluded_paths = ['/api/v1/status/',
-                      '/api/v1/unauthorized/', '/api/v1/forbidden/']
-
     # Check if the request path requires authentication
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
 
     # Check if the Authorization header exists
@@ -2,6 +2,7 @@
 """This module handles basic authentication for the API"""
 
 from flask import request
+from api.v1.auth.path_policy import PathPolicy, compile_policy
 from typing import List, TypeVar
 
 
@@ -16,32 +17,20 @@ class Auth:
             path (str): The path to check.
             excluded_paths (list): A list of paths that are excluded from
                                 authentication, which can include
-                                wildcards (*).
+                                wildcards (*), or a compiled PathPolicy.
 
         Returns:
             bool: True if authentication is required,
             False if the path is excluded.
         """
+        if isinstance(excluded_paths, PathPolicy):
+            return excluded_paths.require_auth(path)
+
         if path is None or excluded_paths is None or len(excluded_paths) == 0:
             return True
 
-        # Normalize the path (ensure it has no trailing slash)
-        if path[-1] != '/':
-            path += '/'
-
-        for excluded_path in excluded_paths:
-            # Check if excluded_path ends with '*' (wildcard)
-            if excluded_path.endswith('*'):
-                # Remove the '*' and compare with
-                # the start of the requested path
-                if path.startswith(excluded_path[:-1]):
-                    return False
-            else:
-                # If exact match, return False (no authentication required)
-                if path == excluded_path:
-                    return False
-
-        return True
+        # Compile the list once, then reuse it for the same list
+        return compile_policy(tuple(excluded_paths)).require_auth(path)
 
     def authorization_header(self, request=None) -> str:
         """Retrieves the authorization header from a request.
@@ -3,12 +3,26 @@
 """
 from api.v1.auth.auth import Auth
 import base64
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import time
 from typing import TypeVar
 
 
 class BasicAuth(Auth):
     """Basic Authentication class"""
 
+    # Cache of verified Authorization headers: keyed hash of the header
+    # -> (user ID, password hash, expiry time), least recently used first
+    credentials_cache = OrderedDict()
+    credentials_cache_size = int(os.getenv('BASIC_AUTH_CACHE_SIZE', '1024'))
+    credentials_cache_ttl = int(os.getenv('BASIC_AUTH_CACHE_TTL', '300'))
+    _credentials_cache_key = os.urandom(32)
+    _credentials_cache_lock = threading.Lock()
+
     def extract_base64_authorization_header(
             self, authorization_header: str) -> str:
         """
@@ -130,6 +144,11 @@ class BasicAuth(Auth):
         if auth_header is None:
             return None
 
+        # Reuse a recent verification of the same header
+        user = self.cached_user(auth_header)
+        if user is not None:
+            return user
+
         # Extract the Base64 part from the Authorization header
         base64_auth = self.extract_base64_authorization_header(auth_header)
 
@@ -152,4 +171,66 @@ class BasicAuth(Auth):
         # Retrieve the User instance from the credentials
         user = self.user_object_from_credentials(user_email, user_pwd)
 
+        if user is not None:
+            self.cache_user(auth_header, user)
+
+        return user
+
+    def _credentials_digest(self, authorization_header: str) -> bytes:
+        """Returns the keyed hash of an Authorization header, so the
+        cache never holds credentials in clear"""
+        return hmac.new(self._credentials_cache_key,
+                        authorization_header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def cache_user(self, authorization_header: str, user: TypeVar('User')):
+        """
+        Remembers the user verified for an Authorization header.
+
+        Args:
+            authorization_header (str): The verified Authorization header.
+            user (User): The user matching its credentials.
+        """
+        if self.credentials_cache_size <= 0:
+            return
+        digest = self._credentials_digest(authorization_header)
+        expires_at = time.monotonic() + self.credentials_cache_ttl
+        with self._credentials_cache_lock:
+            self.credentials_cache[digest] = (user.id, user.password,
+                                              expires_at)
+            self.credentials_cache.move_to_end(digest)
+            while len(self.credentials_cache) > self.credentials_cache_size:
+                self.credentials_cache.popitem(last=False)
+
+    def cached_user(self, authorization_header: str) -> TypeVar('User'):
+        """
+        Retrieves the user recently verified for an Authorization header.
+
+        Args:
+            authorization_header (str): The Authorization HTTP header.
+
+        Returns:
+            User: The cached user, or None if the header isn't cached,
+            its entry expired, or the user was removed or changed
+            password since.
+        """
+        if self.credentials_cache_size <= 0:
+            return None
+        digest = self._credentials_digest(authorization_header)
+        with self._credentials_cache_lock:
+            entry = self.credentials_cache.get(digest)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                del self.credentials_cache[digest]
+                return None
+            self.credentials_cache.move_to_end(digest)
+
+        from models.user import User
+
+        user = User.get(entry[0])
+        if user is None or user.password != entry[1]:
+            with self._credentials_cache_lock:
+                self.credentials_cache.pop(digest, None)
+            return None
         return user
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+""" Response compression module
+
+Compresses the API responses with gzip or deflate, as negotiated by the
+`Accept-Encoding` request header. Responses smaller than
+API_COMPRESS_MIN_SIZE bytes are left alone; streamed responses are
+compressed on the fly, chunk by chunk.
+"""
+from os import getenv
+from flask import Flask, Response, request
+import zlib
+
+
+COMPRESS_MIN_SIZE = int(getenv('API_COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_LEVEL = int(getenv('API_COMPRESS_LEVEL', '6'))
+COMPRESS_MIMETYPES = frozenset(['application/json', 'text/plain',
+                                'text/html'])
+# zlib window bits of each content coding: gzip header or zlib header
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def init_compression(app: Flask):
+    """ Compress the responses of an application
+    """
+    app.after_request(compress_response)
+
+
+def compress_response(response: Response) -> Response:
+    """ Compress a response if the client accepts it and it is worth it
+    """
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if response.mimetype not in COMPRESS_MIMETYPES or \
+            'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(list(WBITS))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED,
+                                      WBITS[encoding])
+        response.set_data(compressor.compress(data) + compressor.flush())
+
+    response.headers['Content-Encoding'] = encoding
+    # The compressed body differs byte-wise: its validator becomes weak
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def compress_stream(chunks, encoding: str):
+    """ Yield the compressed chunks of a streamed response body
+    """
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED,
+                                  WBITS[encoding])
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" JSON provider module
+
+Serializes the API responses with orjson when it is installed, and with
+the standard library encoder otherwise. Both encode `datetime` values
+natively in the models' TIMESTAMP_FORMAT.
+"""
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from models.base import TIMESTAMP_FORMAT
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """ JSON provider using orjson when available """
+
+    @staticmethod
+    def default(o):
+        """ Encode the values the standard library encoder doesn't know
+        """
+        if type(o) is datetime:
+            return o.strftime(TIMESTAMP_FORMAT)
+        return DefaultJSONProvider.default(o)
+
+    def _dumps_bytes(self, obj) -> bytes:
+        """ Serialize to UTF-8 bytes with orjson, or None if it can't
+        """
+        if orjson is None:
+            return None
+        # Naive datetimes without microseconds match TIMESTAMP_FORMAT
+        option = orjson.OPT_OMIT_MICROSECONDS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        """ Serialize data as JSON to a string
+        """
+        if len(kwargs) == 0:
+            result = self._dumps_bytes(obj)
+            if result is not None:
+                return result.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        """ Deserialize data as JSON
+        """
+        if orjson is not None and len(kwargs) == 0:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """ Serialize the given arguments as JSON and return a response
+        with the application/json mimetype
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and
+                                     self._app.debug):
+            return super().response(obj)
+        result = self._dumps_bytes(obj)
+        if result is None:
+            return super().response(obj)
+        return self._app.response_class(result + b"\n",
+                                        mimetype=self.mimetype)
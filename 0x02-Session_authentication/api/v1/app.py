@@ -6,15 +6,30 @@ from os import getenv
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
+from api.v1.compression import init_compression
+from api.v1.json_provider import FastJSONProvider
+from api.v1 import loader
 from api.v1.auth.basic_auth import BasicAuth
+from api.v1.auth.auth import AuthContext
+from api.v1.auth.path_policy import PathPolicy
 from api.v1.auth.session_db_auth import SessionDBAuth
 
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
+init_compression(app)
 
 auth = None
+# Paths that don't require authentication, compiled once
+EXCLUDED_PATHS = PathPolicy([
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/'
+])
+LOAD_TIMEOUT = float(getenv('API_LOAD_TIMEOUT', '30'))
 auth_type = getenv('AUTH_TYPE', None)
 
 # Initialize auth instance based on AUTH_TYPE
@@ -32,6 +47,10 @@ elif auth_type == 'session_exp_auth':
     auth = SessionExpAuth()
 elif auth_type == 'session_db_auth':
     auth = SessionDBAuth()
+elif auth_type == 'chain_auth':
+    from api.v1.auth.chain_auth import ChainAuth
+    auth = ChainAuth.from_names(getenv('AUTH_CHAIN',
+                                       'session_auth,basic_auth'))
 
 
 @app.errorhandler(404)
@@ -53,23 +72,26 @@ def forbidden_error(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+@app.errorhandler(503)
+def unavailable_error(error) -> str:
+    """Custom error handler for 503 status code."""
+    return jsonify({"error": "Service Unavailable"}), 503
+
+
 @app.before_request
 def before_request() -> str:
     """This method runs before each request to secure the API"""
 
+    # Hold requests until the models are loaded, except the status check
+    if request.path.rstrip('/') != '/api/v1/status' and \
+            not loader.wait_ready(LOAD_TIMEOUT):
+        abort(503)  # Service Unavailable
+
     if auth is None:
         return
 
-    # Define paths that don't require authentication
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/'  # New excluded path
-    ]
-
     # Check if the request path requires authentication
-    if not auth.require_auth(request.path, excluded_paths):
+    if not auth.require_auth(request.path, EXCLUDED_PATHS):
         return
 
     # Check if both authorization header and session cookie are missing
@@ -77,8 +99,11 @@ def before_request() -> str:
             request) is None and auth.session_cookie(request) is None:
         abort(401)  # Unauthorized
 
-    # Check if the current user is authenticated
-    request.current_user = auth.current_user(request)
+    # Check if the current user is authenticated, once per request:
+    # views reuse request.current_user (or g.auth_context)
+    context = AuthContext.of(request)
+    request.current_user = context.resolve(
+        'current_user', lambda: auth.current_user(request))
     if request.current_user is None:
         abort(403)  # Forbidden
 
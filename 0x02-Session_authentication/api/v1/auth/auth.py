@@ -1,9 +1,53 @@
 #!/usr/bin/env python3
 """This module handles basic authentication for the API"""
 
+import flask
 from flask import request
+from api.v1 import config
+from api.v1.auth.path_policy import PathPolicy, compile_policy
 from typing import List, TypeVar
-import os
+
+
+class AuthContext:
+    """Authentication data of one request, each resolved at most once"""
+
+    def __init__(self):
+        """Initializes an empty context"""
+        self.values = {}
+
+    @staticmethod
+    def of(request=None) -> 'AuthContext':
+        """
+        Returns the context of a request.
+
+        Args:
+            request: A request object.
+
+        Returns:
+            AuthContext: The context of the current Flask request,
+            created on first use, or None for any other request object.
+        """
+        if request is None or not flask.has_request_context():
+            return None
+        if request is not flask.request and \
+                request is not flask.request._get_current_object():
+            return None
+        context = flask.g.get('auth_context')
+        if context is None:
+            context = AuthContext()
+            flask.g.auth_context = context
+        return context
+
+    def resolve(self, key, resolver):
+        """
+        Returns the value of a key, computed by resolver() on first use.
+        """
+        try:
+            return self.values[key]
+        except KeyError:
+            value = resolver()
+            self.values[key] = value
+            return value
 
 
 class Auth:
@@ -17,32 +61,20 @@ class Auth:
             path (str): The path to check.
             excluded_paths (list): A list of paths that are excluded from
                                 authentication, which can include
-                                wildcards (*).
+                                wildcards (*), or a compiled PathPolicy.
 
         Returns:
             bool: True if authentication is required,
             False if the path is excluded.
         """
+        if isinstance(excluded_paths, PathPolicy):
+            return excluded_paths.require_auth(path)
+
         if path is None or excluded_paths is None or len(excluded_paths) == 0:
             return True
 
-        # Normalize the path (ensure it has no trailing slash)
-        if path[-1] != '/':
-            path += '/'
-
-        for excluded_path in excluded_paths:
-            # Check if excluded_path ends with '*' (wildcard)
-            if excluded_path.endswith('*'):
-                # Remove the '*' and compare with
-                # the start of the requested path
-                if path.startswith(excluded_path[:-1]):
-                    return False
-            else:
-                # If exact match, return False (no authentication required)
-                if path == excluded_path:
-                    return False
-
-        return True
+        # Compile the list once, then reuse it for the same list
+        return compile_policy(tuple(excluded_paths)).require_auth(path)
 
     def authorization_header(self, request=None) -> str:
         """Retrieves the authorization header from a request.
@@ -50,6 +82,11 @@ class Auth:
         """
         if request is None:
             return None
+        context = AuthContext.of(request)
+        if context is not None:
+            return context.resolve(
+                'authorization_header',
+                lambda: request.headers.get('Authorization', None))
         return request.headers.get('Authorization', None)
 
     def current_user(self, request=None) -> TypeVar('User'):
@@ -68,10 +105,15 @@ class Auth:
         if request is None:
             return None
 
-        # Retrieve the session cookie name from the environment variable
-        session_cookie_name = os.getenv('SESSION_NAME')
+        # Retrieve the session cookie name from the startup configuration
+        session_cookie_name = config.CONFIG.session_name
         if session_cookie_name is None:
             return None
 
-        # Retrieve the session cookie value from the request
+        # Retrieve the session cookie value from the request, once
+        context = AuthContext.of(request)
+        if context is not None:
+            return context.resolve(
+                'session_cookie',
+                lambda: request.cookies.get(session_cookie_name))
         return request.cookies.get(session_cookie_name)
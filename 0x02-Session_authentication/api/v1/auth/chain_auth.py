@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+""" This module chains several authentication schemes for the API """
+from api.v1.auth.auth import Auth
+from typing import List, TypeVar
+import threading
+import time
+
+
+class ChainAuth(Auth):
+    """Tries several authentication schemes, cheapest expected first"""
+
+    # Number of authentications between two reorderings of the schemes
+    reorder_interval = 100
+
+    def __init__(self, schemes: List[Auth]):
+        """
+        Initializes the chain.
+
+        Args:
+            schemes (list): The Auth instances to try, in initial order.
+        """
+        super().__init__()
+        self.schemes = list(schemes)
+        self._stats = {id(scheme): {"calls": 0, "hits": 0, "seconds": 0.0}
+                       for scheme in self.schemes}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_names(cls, names: str) -> 'ChainAuth':
+        """
+        Builds a chain from AUTH_TYPE names.
+
+        Args:
+            names (str): Comma-separated names, e.g. "session_auth,basic_auth".
+
+        Returns:
+            ChainAuth: The chain of the known schemes.
+        """
+        from api.v1.auth.basic_auth import BasicAuth
+        from api.v1.auth.session_auth import SessionAuth
+        from api.v1.auth.session_exp_auth import SessionExpAuth
+        from api.v1.auth.session_db_auth import SessionDBAuth
+
+        classes = {
+            'basic_auth': BasicAuth,
+            'session_auth': SessionAuth,
+            'session_exp_auth': SessionExpAuth,
+            'session_db_auth': SessionDBAuth,
+        }
+        return cls([classes[name.strip()]() for name in names.split(',')
+                    if name.strip() in classes])
+
+    def _cost(self, scheme: Auth) -> float:
+        """Returns the expected time spent per success of a scheme"""
+        stats = self._stats[id(scheme)]
+        latency = stats["seconds"] / stats["calls"] if stats["calls"] else 0
+        # Smoothed hit rate, so unused schemes are still tried
+        hit_rate = (stats["hits"] + 1) / (stats["calls"] + 2)
+        return latency / hit_rate
+
+    def _record(self, scheme: Auth, hit: bool, seconds: float):
+        """Records one call of a scheme, reordering the chain from time
+        to time"""
+        with self._lock:
+            stats = self._stats[id(scheme)]
+            stats["calls"] += 1
+            stats["hits"] += 1 if hit else 0
+            stats["seconds"] += seconds
+            self._calls += 1
+            if self._calls % self.reorder_interval == 0:
+                self.schemes = sorted(self.schemes, key=self._cost)
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """Returns the user of the first scheme authenticating the
+        request, trying the cheapest expected scheme first"""
+        for scheme in self.schemes:
+            start = time.perf_counter()
+            user = scheme.current_user(request)
+            self._record(scheme, user is not None,
+                         time.perf_counter() - start)
+            if user is not None:
+                return user
+        return None
+
+    def session_scheme(self) -> Auth:
+        """Returns the first scheme managing sessions, or None"""
+        for scheme in self.schemes:
+            if hasattr(scheme, 'create_session'):
+                return scheme
+        return None
+
+    def create_session(self, user_id: str = None) -> str:
+        """Creates a session with the session scheme of the chain"""
+        scheme = self.session_scheme()
+        if scheme is None:
+            return None
+        return scheme.create_session(user_id)
+
+    def destroy_session(self, request=None) -> bool:
+        """Deletes a session with the session scheme of the chain"""
+        scheme = self.session_scheme()
+        if scheme is None:
+            return False
+        return scheme.destroy_session(request)
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Deletes all the sessions of a user with the session scheme of
+        the chain"""
+        scheme = self.session_scheme()
+        if scheme is None:
+            return 0
+        return scheme.destroy_all_sessions(user_id)
+
+    def session_count(self, user_id: str = None) -> int:
+        """Returns the number of sessions of a user in the session
+        scheme of the chain"""
+        scheme = self.session_scheme()
+        if scheme is None:
+            return 0
+        return scheme.session_count(user_id)
+
+    def session_stats(self) -> dict:
+        """Returns the session metrics of the session scheme, if any"""
+        scheme = self.session_scheme()
+        if not hasattr(scheme, 'session_stats'):
+            return None
+        return scheme.session_stats()
+
+    def scheme_stats(self) -> list:
+        """Returns the calls, hits and mean latency of each scheme, in
+        their current order"""
+        with self._lock:
+            result = []
+            for scheme in self.schemes:
+                stats = self._stats[id(scheme)]
+                calls = stats["calls"]
+                result.append({
+                    "scheme": type(scheme).__name__,
+                    "calls": calls,
+                    "hits": stats["hits"],
+                    "mean_latency": stats["seconds"] / calls if calls else 0,
+                })
+            return result
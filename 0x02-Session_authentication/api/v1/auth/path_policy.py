@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+""" This module compiles the paths excluded from authentication
+"""
+from functools import lru_cache
+from typing import Iterable
+import fnmatch
+import re
+
+
+# Trie key marking the end of an excluded prefix
+_END = ''
+
+
+class PathPolicy:
+    """Paths excluded from authentication, compiled once
+
+    Excluded paths are matched the same way as by Auth.require_auth:
+    a path ending with '*' excludes every path starting with what
+    precedes it, any other path must match exactly (with a trailing
+    slash). A '*' elsewhere matches any characters but '/'.
+    """
+
+    def __init__(self, excluded_paths: Iterable[str],
+                 cache_size: int = 1024):
+        """
+        Compiles the excluded paths.
+
+        Args:
+            excluded_paths (list): The paths excluded from authentication.
+            cache_size (int): The number of recent decisions kept.
+        """
+        self.exact = set()
+        self.prefixes = {}
+        patterns = []
+        for excluded_path in excluded_paths:
+            if '*' in excluded_path[:-1]:
+                patterns.append(self._translate(excluded_path))
+            elif excluded_path.endswith('*'):
+                node = self.prefixes
+                for char in excluded_path[:-1]:
+                    node = node.setdefault(char, {})
+                node[_END] = True
+            else:
+                self.exact.add(excluded_path)
+        self.pattern = re.compile('|'.join(patterns)) if patterns else None
+        self.require_auth = lru_cache(maxsize=cache_size)(self._require_auth)
+
+    @staticmethod
+    def _translate(excluded_path: str) -> str:
+        """Returns the regular expression of a path with an inner '*'"""
+        prefix = excluded_path.endswith('*')
+        if prefix:
+            excluded_path = excluded_path[:-1]
+        regex = fnmatch.translate(excluded_path).replace('.*', '[^/]*')
+        if prefix and regex[-2:] in ('\\Z', '\\z'):
+            # Unanchored: matches every path starting like the pattern
+            regex = regex[:-2]
+        return regex
+
+    def _require_auth(self, path: str) -> bool:
+        """
+        Determines if a given path requires authentication, in
+        O(length of the path) whatever the number of excluded paths.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if authentication is required,
+            False if the path is excluded.
+        """
+        if path is None:
+            return True
+
+        # Normalize the path (ensure it has a trailing slash)
+        if path[-1:] != '/':
+            path += '/'
+
+        if path in self.exact:
+            return False
+
+        # Walk the prefix trie along the path
+        node = self.prefixes
+        for char in path:
+            if _END in node:
+                return False
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            if _END in node:
+                return False
+
+        if self.pattern is not None and self.pattern.match(path):
+            return False
+
+        return True
+
+
+@lru_cache(maxsize=32)
+def compile_policy(excluded_paths: tuple) -> PathPolicy:
+    """Returns the compiled policy of a tuple of excluded paths"""
+    return PathPolicy(excluded_paths)
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """ This module handles session authentication for the API """
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import SessionStore
+from api.v1 import config
 from uuid import uuid4
 from models.user import User
 
@@ -8,8 +10,13 @@ from models.user import User
 class SessionAuth(Auth):
     """ This class handles session authentication for the API """
 
-    # Class attribute to store session IDs and corresponding user IDs
-    user_id_by_session_id = {}
+    # Class attribute to store session IDs and corresponding user IDs,
+    # bounded by SESSION_CAPACITY and SESSION_PER_USER_LIMIT and split
+    # into SESSION_STRIPES independently locked shards
+    user_id_by_session_id = SessionStore(
+        config.CONFIG.session_capacity,
+        config.CONFIG.session_per_user_limit,
+        config.CONFIG.session_stripes)
 
     def create_session(self, user_id: str = None) -> str:
         """Creates a session ID for a given user ID and stores it
@@ -27,8 +34,8 @@ class SessionAuth(Auth):
         # Generate a session ID using uuid4
         session_id = str(uuid4())
 
-        # Store the session ID with the user ID in the dictionary
-        self.user_id_by_session_id[session_id] = user_id
+        # Store the session ID with the user ID in the session store
+        self.user_id_by_session_id.put(session_id, user_id)
 
         return session_id
 
@@ -45,7 +52,10 @@ class SessionAuth(Auth):
         if session_id is None or not isinstance(session_id, str):
             return None
 
-        return self.user_id_by_session_id.get(session_id)
+        entry = self.user_id_by_session_id.entry(session_id)
+        if entry is None:
+            return None
+        return entry.user_id
 
     def current_user(self, request=None) -> str:
         """Returns a User instance based on a cookie value"""
@@ -79,9 +89,30 @@ class SessionAuth(Auth):
         if user_id is None:
             return False
 
-        # Remove the session ID from the session dictionary
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
-            return True
+        # Remove the session ID from the session store, atomically so
+        # that only one of concurrent logouts succeeds
+        return self.user_id_by_session_id.discard(session_id) is not None
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Deletes all the sessions of a user (revoke all)
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        return len(self.user_id_by_session_id.discard_user(user_id))
+
+    def session_count(self, user_id: str = None) -> int:
+        """Returns the number of sessions of a user"""
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        return self.user_id_by_session_id.user_session_count(user_id)
 
-        return False
+    def session_stats(self) -> dict:
+        """Returns the size, limits and eviction counters of the
+        session store"""
+        return self.user_id_by_session_id.stats()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Module that provides functionality to manage sessions stored in DB"""
 from api.v1.auth.session_exp_auth import SessionExpAuth
+from models.base import class_lock
 from models.user_session import UserSession
 from datetime import datetime, timedelta
 
@@ -8,6 +9,13 @@ from datetime import datetime, timedelta
 class SessionDBAuth(SessionExpAuth):
     """SessionDBAuth class for managing sessions stored in database"""
 
+    def __init__(self):
+        """Initializes the authentication and drops the sessions evicted
+        from the memory store from the database too"""
+        super().__init__()
+        self.user_id_by_session_id.add_evict_listener(
+            SessionDBAuth.delete_user_sessions)
+
     def create_session(self, user_id=None):
         """Creates a session and stores it in the database"""
         session_id = super().create_session(user_id)
@@ -20,6 +28,40 @@ class SessionDBAuth(SessionExpAuth):
 
         return session_id
 
+    def expire_sessions(self, session_ids: list):
+        """Removes the sessions evicted by the sweeper from the database"""
+        self.delete_user_sessions(session_ids)
+
+    @staticmethod
+    def delete_user_sessions(session_ids: list):
+        """Removes sessions from the database"""
+        user_sessions = [UserSession.get_by_session_id(session_id)
+                         for session_id in session_ids]
+        UserSession.remove_many([user_session.id
+                                 for user_session in user_sessions
+                                 if user_session is not None])
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Deletes all the sessions of a user from memory and from the
+        database, in O(sessions of the user)"""
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        session_ids = set(self.user_id_by_session_id.discard_user(user_id))
+        user_sessions = UserSession.search_by_user_id(user_id)
+        UserSession.remove_many([user_session.id
+                                 for user_session in user_sessions])
+        session_ids.update(user_session.session_id
+                           for user_session in user_sessions)
+        if session_ids:
+            self._compact_expiry_heap()
+        return len(session_ids)
+
+    def session_count(self, user_id: str = None) -> int:
+        """Returns the number of sessions of a user in the database"""
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        return len(UserSession.search_by_user_id(user_id))
+
     def user_id_for_session_id(self, session_id=None):
         """Returns the user ID associated with
         the session from the database
@@ -28,22 +70,39 @@ class SessionDBAuth(SessionExpAuth):
             return None
 
         # Load UserSession from the database
-        try:
-            all_sessions = UserSession.all()
-            for session in all_sessions:
-                if session.session_id == session_id:
-                    # Check if the session has expired
-                    if self.session_duration <= 0:
-                        return session.user_id
-                    created_at = session.created_at
-                    if created_at + timedelta(
-                            seconds=self.session_duration) < datetime.now():
-                        return None
-                    return session.user_id
-        except (FileNotFoundError, KeyError):
+        session = UserSession.get_by_session_id(session_id)
+        if session is None:
             return None
+        # Mark the session as active in the memory store, whose
+        # evictions over capacity delete sessions from the database
+        self.user_id_by_session_id.entry(session_id)
 
-        return None
+        # Check if the session has expired
+        if self.session_duration <= 0:
+            return session.user_id
+        now = datetime.utcnow()
+        start = session.updated_at if self.sliding else session.created_at
+        if start + timedelta(seconds=self.session_duration) < now:
+            return None
+        if self.sliding and now - session.updated_at >= \
+                timedelta(seconds=self.refresh_window):
+            self.touch_session(session)
+        return session.user_id
+
+    def touch_session(self, user_session: UserSession):
+        """Extends the lifetime of a session in memory and in the
+        database, writing it at most once per refresh window"""
+        self.refresh_session(user_session.session_id)
+        window = timedelta(seconds=self.refresh_window)
+        # Concurrent lookups of the session refresh it only once: the
+        # check and the save are atomic under the writer lock of the
+        # class, which the save takes anyway for its journal write
+        with class_lock(UserSession.__name__):
+            now = datetime.utcnow()
+            if now - user_session.updated_at < window:
+                return
+            user_session.updated_at = now
+            user_session.save()
 
     def destroy_session(self, request=None):
         """Destroys a session based on the session ID"""
@@ -54,18 +113,10 @@ class SessionDBAuth(SessionExpAuth):
         if not session_id:
             return False
 
-        try:
-            all_sessions = UserSession.all()
-            # Filter out the session to delete
-            new_sessions = [
-                session for session in all_sessions
-                if session.session_id != session_id]
-
-            if len(new_sessions) == len(all_sessions):  # No session found
-                return False
-
-            # Save updated sessions to the file
-            UserSession.save_to_file(new_sessions)
-            return True
-        except (FileNotFoundError, KeyError):
+        # Drop the session from memory and from the database
+        if self.user_id_by_session_id.discard(session_id) is not None:
+            self._compact_expiry_heap()
+        user_session = UserSession.get_by_session_id(session_id)
+        if user_session is None:  # No session found
             return False
+        return UserSession.remove_many([user_session.id]) > 0
@@ -2,21 +2,50 @@
 """ SessionExpAuth module
 """
 from api.v1.auth.session_auth import SessionAuth
-from os import getenv
-from datetime import datetime, timedelta
+from api.v1 import config
+from datetime import datetime
+import heapq
+import os
+import threading
+import time
 
 
 class SessionExpAuth(SessionAuth):
     """ SessionExpAuth class that adds session expiration """
 
+    # Expiry index: heap of (expiry timestamp, session store key)
+    session_expiry_heap = []
+    sweep_interval = 30
+    sweep_batch = 1000
+    # The heap is rebuilt from the stored sessions once it holds more
+    # than twice as many entries as there are sessions (and this many)
+    heap_compact_min = 1024
+    _expiry_lock = threading.Lock()
+    _sweeper = None
+    _sweeper_pid = None
+    _evict_listener = None
+
     def __init__(self):
         """ Initialize the session expiration with duration """
         super().__init__()
-        session_duration = getenv('SESSION_DURATION')
+        session_duration = config.CONFIG.session_duration
         try:
             self.session_duration = int(session_duration)
         except (TypeError, ValueError):
             self.session_duration = 0
+        # Sliding expiration: each lookup extends the session lifetime,
+        # at most once per refresh window, which is at most half the
+        # session lifetime so that an active session never expires
+        self.sliding = config.CONFIG.session_sliding
+        self.refresh_window = config.CONFIG.session_refresh_window
+        if self.session_duration > 0:
+            self.refresh_window = min(self.refresh_window,
+                                      self.session_duration // 2)
+        # Sessions evicted from the store leave stale heap entries
+        cls = SessionExpAuth
+        if cls._evict_listener is None:
+            cls._evict_listener = self._on_evicted
+            self.user_id_by_session_id.add_evict_listener(self._on_evicted)
 
     def create_session(self, user_id=None):
         """ Create a session with expiration """
@@ -24,32 +53,198 @@ class SessionExpAuth(SessionAuth):
         if session_id is None:
             return None
 
-        session_dict = {
-            "user_id": user_id,
-            "created_at": datetime.now()
-        }
-        self.user_id_by_session_id[session_id] = session_dict
+        created_at = datetime.now()
+        self.user_id_by_session_id.put(session_id, user_id, created_at)
+
+        if self.session_duration > 0:
+            self._schedule_expiry(session_id, int(created_at.timestamp()))
+            self._start_sweeper()
         return session_id
 
+    def _schedule_expiry(self, session_id, start: int):
+        """ Index the expiry of a session whose lifetime starts at `start`
+        """
+        with self._expiry_lock:
+            heapq.heappush(self.session_expiry_heap,
+                           (start + self.session_duration,
+                            self.user_id_by_session_id.key(session_id)))
+        # Logins and refreshes must not grow the heap past the store
+        self._compact_expiry_heap()
+
+    def _on_evicted(self, session_ids: list):
+        """ Compact the expiry heap after evictions from the store """
+        self._compact_expiry_heap()
+
+    def _compact_expiry_heap(self):
+        """ Rebuild the expiry heap from the stored sessions once its
+        stale entries (of sessions logged out, revoked, evicted or
+        refreshed) outnumber the live ones
+
+        Amortized over the entries that made it grow, this keeps the
+        heap within twice the size of the session store.
+        """
+        if self.session_duration <= 0:
+            return
+        store = self.user_id_by_session_id
+        heap = self.session_expiry_heap
+        if len(heap) <= max(self.heap_compact_min, 2 * len(store)):
+            return
+        with self._expiry_lock:
+            if len(heap) <= max(self.heap_compact_min, 2 * len(store)):
+                return
+            heap[:] = [(self._expires_at(entry), key)
+                       for key, entry in store.records()
+                       if entry.created_at is not None]
+            heapq.heapify(heap)
+
+    def destroy_session(self, request=None):
+        """ Delete the session of a request and compact the expiry heap
+        """
+        destroyed = super().destroy_session(request)
+        if destroyed:
+            self._compact_expiry_heap()
+        return destroyed
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """ Delete all the sessions of a user and compact the expiry heap
+        """
+        count = super().destroy_all_sessions(user_id)
+        if count > 0:
+            self._compact_expiry_heap()
+        return count
+
+    def _expires_at(self, entry) -> int:
+        """ Return the expiry timestamp of a session record """
+        start = entry.refreshed_at if self.sliding else entry.created_at
+        return start + self.session_duration
+
+    def refresh_session(self, session_id) -> bool:
+        """ Extend the lifetime of a session with sliding expiration
+
+        The refresh is skipped if the session was refreshed less than
+        refresh_window seconds ago. Return True if it was refreshed.
+        """
+        if not self.sliding or self.session_duration <= 0:
+            return False
+        now = int(time.time())
+        if not self.user_id_by_session_id.refresh(session_id, now,
+                                                  self.refresh_window):
+            return False
+        # The previous heap entry is now stale: the sweeper skips it
+        self._schedule_expiry(session_id, now)
+        return True
+
     def user_id_for_session_id(self, session_id=None):
         """ Return user_id if session is valid and not expired """
         if session_id is None:
             return None
 
-        session_dict = self.user_id_by_session_id.get(session_id)
-        if session_dict is None:
+        entry = self.user_id_by_session_id.entry(session_id)
+        if entry is None:
             return None
 
         if self.session_duration <= 0:
-            return session_dict.get("user_id")
+            return entry.user_id
 
-        created_at = session_dict.get("created_at")
-        if created_at is None:
+        if entry.created_at is None:
             return None
 
         # Check if the session has expired
-        if created_at + timedelta(
-                seconds=self.session_duration) < datetime.now():
+        now = time.time()
+        if self._expires_at(entry) < now:
             return None
 
-        return session_dict.get("user_id")
+        if self.sliding and now - entry.refreshed_at >= self.refresh_window:
+            self.refresh_session(session_id)
+        return entry.user_id
+
+    def sweep_expired_sessions(self, limit: int = None) -> int:
+        """ Pop at most `limit` expired heap entries, oldest expiry first,
+        evicting their sessions
+
+        Return the number of sessions evicted.
+        """
+        if limit is None:
+            limit = self.sweep_batch
+        store = self.user_id_by_session_id
+        now = time.time()
+        expired = []
+        with self._expiry_lock:
+            heap = self.session_expiry_heap
+            popped = 0
+            while heap and heap[0][0] < now and popped < limit:
+                expires_at, key = heapq.heappop(heap)
+                popped += 1
+                # Entries of refreshed sessions are stale and skipped
+                if store.discard(key, when=lambda entry:
+                                 entry.created_at is not None and
+                                 self._expires_at(entry) < now):
+                    expired.append(key)
+        if expired:
+            self.expire_sessions([store.session_id(key) for key in expired])
+        return len(expired)
+
+    def expire_sessions(self, session_ids: list):
+        """ Hook called with the IDs of the sessions just evicted """
+        pass
+
+    def session_stats(self) -> dict:
+        """ Return the store statistics with the number of live and of
+        expired but not yet evicted sessions, and the size of the expiry
+        heap
+        """
+        now = time.time()
+        with self._expiry_lock:
+            heap = self.session_expiry_heap
+            # Expired entries form a subtree at the top of the heap
+            expired = set()
+            stack = [0] if heap else []
+            while stack:
+                i = stack.pop()
+                if heap[i][0] < now:
+                    entry = self.user_id_by_session_id.entry(heap[i][1],
+                                                             touch=False)
+                    # Refreshed sessions have stale entries: skip them
+                    if entry is not None and entry.created_at is not None \
+                            and self._expires_at(entry) < now:
+                        expired.add(heap[i][1])
+                    stack.extend(j for j in (2 * i + 1, 2 * i + 2)
+                                 if j < len(heap))
+            stats = super().session_stats()
+            stats["expiry_heap"] = len(heap)
+        stats["live"] = max(0, stats["sessions"] - len(expired))
+        stats["expired"] = len(expired)
+        return stats
+
+    def _start_sweeper(self):
+        """ Start the background sweeper of this process if not running
+        """
+        cls = SessionExpAuth
+        if cls._sweeper_pid == os.getpid() and cls._sweeper.is_alive():
+            return
+        with self._expiry_lock:
+            if cls._sweeper_pid == os.getpid() and cls._sweeper.is_alive():
+                return
+            cls._sweeper = threading.Thread(target=self._sweep_forever,
+                                            name="session-sweeper",
+                                            daemon=True)
+            cls._sweeper_pid = os.getpid()
+            cls._sweeper.start()
+
+    def _expired_pending(self) -> bool:
+        """ Check if the heap still holds expired entries """
+        with self._expiry_lock:
+            heap = self.session_expiry_heap
+            return len(heap) > 0 and heap[0][0] < time.time()
+
+    def _sweep_forever(self):
+        """ Sweep expired sessions every sweep_interval seconds, in
+        batches of sweep_batch heap entries
+        """
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep_expired_sessions()
+            while self._expired_pending():
+                # Let other threads take the lock between two batches
+                time.sleep(0)
+                self.sweep_expired_sessions()
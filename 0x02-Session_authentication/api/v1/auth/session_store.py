@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+""" This module stores the sessions of the API in bounded memory """
+from collections.abc import MutableMapping
+from datetime import datetime
+import sys
+import threading
+import uuid
+
+
+class SessionEntry:
+    """Compact session record: interned user ID and integer epochs"""
+
+    __slots__ = ('user_id', 'created_at', 'refreshed_at')
+
+    def __init__(self, user_id: str, created_at: int = None):
+        """
+        Initializes a record.
+
+        Args:
+            user_id (str): The ID of the user of the session.
+            created_at (int): The creation time in seconds since the
+                epoch, or None for a session without expiration.
+        """
+        self.user_id = sys.intern(user_id) if isinstance(user_id, str) \
+            else user_id
+        self.created_at = created_at
+        # Last time the lifetime of the session was extended
+        self.refreshed_at = created_at
+
+
+class _Stripe:
+    """One independently locked part of a session store"""
+
+    __slots__ = ('items', 'lock', 'evictions', 'capacity')
+
+    def __init__(self, capacity: int = 0):
+        """Initializes an empty stripe of at most `capacity` items"""
+        # Insertion ordered: touched items are popped and reinserted
+        self.items = {}
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.capacity = capacity
+
+
+class SessionStore(MutableMapping):
+    """Session ID -> session mapping with a bounded size
+
+    Sessions are sharded by the hash of their ID into `stripes` parts,
+    each with its own lock, so that threads working on different
+    sessions don't contend. Every operation on one session is atomic.
+
+    Within a stripe, sessions are kept from least to most recently
+    active. Beyond `capacity` sessions (split over the stripes, of which
+    there are at most `capacity`) the least recently active session of
+    the stripe is evicted, and beyond `per_user_limit` sessions of one
+    user that user's oldest session is evicted. A limit of 0 disables it.
+
+    Session IDs in canonical UUID form are kept as 16 bytes and sessions
+    as SessionEntry records. As a mapping, the store still takes and
+    returns user ID strings, or `{"user_id", "created_at"}` dictionaries
+    for sessions with a creation time.
+    """
+
+    def __init__(self, capacity: int = 0, per_user_limit: int = 0,
+                 stripes: int = 16):
+        """
+        Initializes an empty store.
+
+        Args:
+            capacity (int): The maximum number of sessions.
+            per_user_limit (int): The maximum number of sessions per user.
+            stripes (int): The number of independently locked shards.
+        """
+        stripes = max(1, min(stripes, capacity) if capacity > 0 else stripes)
+        self.capacity = capacity
+        self.per_user_limit = per_user_limit
+        # The stripe capacities add up to the capacity of the store
+        share, extra = divmod(max(0, capacity), stripes)
+        self._stripes = [_Stripe(share + (i < extra))
+                         for i in range(stripes)]
+        # User ID -> its session key, or the dictionary of its session
+        # keys, oldest first, for a user with several sessions; sharded
+        # by user ID
+        self._users = [_Stripe() for _ in range(stripes)]
+        self._listeners = set()
+
+    @staticmethod
+    def key(session_id):
+        """
+        Returns the compact key of a session ID: 16 bytes for a
+        canonical (lowercase, hyphenated) UUID, the ID itself otherwise.
+        """
+        if type(session_id) is str and len(session_id) == 36 and \
+                session_id[8] == session_id[13] == session_id[18] == \
+                session_id[23] == '-' and session_id.lower() == session_id:
+            try:
+                return bytes.fromhex(session_id.replace('-', ''))
+            except ValueError:
+                pass
+        return session_id
+
+    @staticmethod
+    def session_id(key) -> str:
+        """Returns the session ID of a compact key"""
+        if type(key) is bytes:
+            return str(uuid.UUID(bytes=key))
+        return key
+
+    @staticmethod
+    def _decode(entry: SessionEntry):
+        """Returns the mapping value of a record"""
+        if entry.created_at is None:
+            return entry.user_id
+        return {"user_id": entry.user_id,
+                "created_at": datetime.fromtimestamp(entry.created_at)}
+
+    @staticmethod
+    def _encode(session) -> SessionEntry:
+        """Returns the record of a mapping value"""
+        if isinstance(session, dict):
+            created_at = session.get("created_at")
+            if isinstance(created_at, datetime):
+                created_at = int(created_at.timestamp())
+            return SessionEntry(session.get("user_id"), created_at)
+        return SessionEntry(session)
+
+    def _stripe(self, key) -> _Stripe:
+        """Returns the stripe of a session key"""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _user_stripe(self, user_id) -> _Stripe:
+        """Returns the stripe of the session index of a user"""
+        return self._users[hash(user_id) % len(self._users)]
+
+    @staticmethod
+    def _user_keys(user_sessions) -> tuple:
+        """Returns the session keys of an entry of the user index"""
+        if user_sessions is None:
+            return ()
+        if type(user_sessions) is dict:
+            return tuple(user_sessions)
+        return (user_sessions,)
+
+    def _index(self, key, entry: SessionEntry) -> list:
+        """
+        Adds a session to the sessions of its user.
+
+        Returns:
+            list: The keys of the sessions of the user over the limit.
+        """
+        stripe = self._user_stripe(entry.user_id)
+        over = []
+        with stripe.lock:
+            user_sessions = stripe.items.get(entry.user_id)
+            if user_sessions is None or user_sessions == key:
+                stripe.items[entry.user_id] = key
+                return over
+            if type(user_sessions) is not dict:
+                user_sessions = {user_sessions: None}
+                stripe.items[entry.user_id] = user_sessions
+            user_sessions.pop(key, None)
+            user_sessions[key] = None
+            while 0 < self.per_user_limit < len(user_sessions):
+                over_key = next(iter(user_sessions))
+                del user_sessions[over_key]
+                over.append(over_key)
+            if len(user_sessions) == 1:
+                stripe.items[entry.user_id] = next(iter(user_sessions))
+        return over
+
+    def _unindex(self, key, entry: SessionEntry):
+        """Removes a session from the sessions of its user"""
+        stripe = self._user_stripe(entry.user_id)
+        with stripe.lock:
+            user_sessions = stripe.items.get(entry.user_id)
+            if type(user_sessions) is not dict:
+                if user_sessions == key:
+                    del stripe.items[entry.user_id]
+                return
+            user_sessions.pop(key, None)
+            if len(user_sessions) == 1:
+                stripe.items[entry.user_id] = next(iter(user_sessions))
+
+    def add_evict_listener(self, listener):
+        """
+        Registers a function called with the list of the session IDs
+        evicted over a limit.
+        """
+        self._listeners.add(listener)
+
+    def put(self, session_id, user_id: str, created_at: datetime = None):
+        """
+        Stores a session, evicting others over the limits.
+
+        Args:
+            session_id: The session ID, or its compact key.
+            user_id (str): The ID of the user of the session.
+            created_at (datetime): The creation time, if it expires.
+        """
+        if created_at is not None:
+            created_at = int(created_at.timestamp())
+        self._put(self.key(session_id), SessionEntry(user_id, created_at))
+
+    def _put(self, key, entry: SessionEntry):
+        """Stores a record, evicting others over the limits"""
+        # The user index is updated while the session stripe is locked,
+        # so that it always agrees with the stored sessions. Locks are
+        # taken in that order only, a session stripe then a user stripe,
+        # so that no two threads can wait on each other
+        stripe = self._stripe(key)
+        evicted = []
+        with stripe.lock:
+            previous = stripe.items.pop(key, None)
+            stripe.items[key] = entry
+            while 0 < stripe.capacity < len(stripe.items):
+                oldest = next(iter(stripe.items))
+                evicted.append((oldest, stripe.items.pop(oldest)))
+                stripe.evictions += 1
+            if previous is not None:
+                self._unindex(key, previous)
+            for evicted_key, evicted_entry in evicted:
+                self._unindex(evicted_key, evicted_entry)
+            over = self._index(key, entry)
+
+        if over:
+            user_stripe = self._user_stripe(entry.user_id)
+            for over_key in over:
+                over_stripe = self._stripe(over_key)
+                with over_stripe.lock:
+                    over_entry = over_stripe.items.get(over_key)
+                    if over_entry is None or \
+                            over_entry.user_id != entry.user_id:
+                        continue
+                    del over_stripe.items[over_key]
+                    # In case the session was stored again meanwhile
+                    self._unindex(over_key, over_entry)
+                with user_stripe.lock:
+                    user_stripe.evictions += 1
+                evicted.append((over_key, over_entry))
+
+        if evicted:
+            session_ids = [self.session_id(evicted_key)
+                           for evicted_key, _ in evicted]
+            for listener in list(self._listeners):
+                listener(session_ids)
+
+    def entry(self, session_id, touch: bool = True) -> SessionEntry:
+        """
+        Returns the record of a session.
+
+        Args:
+            session_id: The session ID, or its compact key.
+            touch (bool): Marks the session as the most recently active.
+
+        Returns:
+            SessionEntry: The record, or None if there is no such session.
+        """
+        key = self.key(session_id)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.items.get(key)
+            if entry is not None and touch:
+                stripe.items[key] = stripe.items.pop(key)
+            return entry
+
+    def refresh(self, session_id, now: int, window: int = 0) -> bool:
+        """
+        Extends the lifetime of a session, at most once per window.
+
+        Args:
+            session_id: The session ID, or its compact key.
+            now (int): The current time in seconds since the epoch.
+            window (int): The minimum number of seconds between two
+                refreshes of the session.
+
+        Returns:
+            bool: True if the session was refreshed, False if it doesn't
+            exist, doesn't expire or was refreshed less than `window`
+            seconds ago.
+        """
+        key = self.key(session_id)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.items.get(key)
+            if entry is None or entry.refreshed_at is None or \
+                    now - entry.refreshed_at < window:
+                return False
+            entry.refreshed_at = now
+            return True
+
+    def discard(self, session_id, when=None) -> SessionEntry:
+        """
+        Removes a session, atomically.
+
+        Args:
+            session_id: The session ID, or its compact key.
+            when (callable): If given, the session is only removed if
+                this function returns True for its record.
+
+        Returns:
+            SessionEntry: The removed record, or None if there was no
+            such session.
+        """
+        key = self.key(session_id)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.items.get(key)
+            if entry is None or (when is not None and not when(entry)):
+                return None
+            del stripe.items[key]
+            self._unindex(key, entry)
+        return entry
+
+    def user_session_ids(self, user_id: str) -> list:
+        """Returns the session IDs of a user, oldest first"""
+        stripe = self._user_stripe(user_id)
+        with stripe.lock:
+            keys = self._user_keys(stripe.items.get(user_id))
+        return [self.session_id(key) for key in keys]
+
+    def user_session_count(self, user_id: str) -> int:
+        """Returns the number of sessions of a user"""
+        stripe = self._user_stripe(user_id)
+        with stripe.lock:
+            return len(self._user_keys(stripe.items.get(user_id)))
+
+    def discard_user(self, user_id: str) -> list:
+        """
+        Removes all the sessions of a user, in O(sessions of the user).
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            list: The IDs of the removed sessions.
+        """
+        stripe = self._user_stripe(user_id)
+        with stripe.lock:
+            keys = self._user_keys(stripe.items.pop(user_id, None))
+        removed = []
+        for key in keys:
+            key_stripe = self._stripe(key)
+            with key_stripe.lock:
+                entry = key_stripe.items.get(key)
+                if entry is None or entry.user_id != user_id:
+                    continue
+                del key_stripe.items[key]
+                # In case the session was stored again meanwhile
+                self._unindex(key, entry)
+            removed.append(self.session_id(key))
+        return removed
+
+    def __getitem__(self, session_id):
+        """Returns a session and marks it as the most recently active"""
+        entry = self.entry(session_id)
+        if entry is None:
+            raise KeyError(session_id)
+        return self._decode(entry)
+
+    def __setitem__(self, session_id, session):
+        """Stores a session, evicting others over the limits"""
+        self._put(self.key(session_id), self._encode(session))
+
+    def __delitem__(self, session_id):
+        """Removes a session"""
+        if self.discard(session_id) is None:
+            raise KeyError(session_id)
+
+    def pop(self, session_id, *default):
+        """Removes a session and returns it, atomically"""
+        entry = self.discard(session_id)
+        if entry is None:
+            if default:
+                return default[0]
+            raise KeyError(session_id)
+        return self._decode(entry)
+
+    def __contains__(self, session_id) -> bool:
+        """Checks if a session exists, without marking it active"""
+        key = self.key(session_id)
+        return key in self._stripe(key).items
+
+    def records(self) -> list:
+        """Returns a snapshot of the (key, record) pairs of every stripe"""
+        items = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                items.extend(stripe.items.items())
+        return items
+
+    def __iter__(self):
+        """Iterates over a snapshot of the session IDs"""
+        return (self.session_id(key) for key, _ in self.records())
+
+    def __len__(self) -> int:
+        """Returns the number of sessions"""
+        return sum(len(stripe.items) for stripe in self._stripes)
+
+    def __repr__(self) -> str:
+        """Represents the store like a dictionary"""
+        return repr({self.session_id(key): self._decode(entry)
+                     for key, entry in self.records()})
+
+    def stats(self) -> dict:
+        """Returns the size, limits and eviction counters of the store"""
+        return {
+            "sessions": len(self),
+            "users": sum(len(stripe.items) for stripe in self._users),
+            "capacity": self.capacity,
+            "per_user_limit": self.per_user_limit,
+            "stripes": len(self._stripes),
+            "evictions": {
+                "capacity": sum(stripe.evictions
+                                for stripe in self._stripes),
+                "per_user": sum(stripe.evictions for stripe in self._users),
+            },
+        }
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+""" Configuration module
+
+Snapshot of the environment configuration read by request handlers,
+taken once at startup so that no environment lookup is left on the
+request path.
+"""
+from os import environ
+
+
+class Config():
+    """ Snapshot of the environment configuration
+    """
+
+    def __init__(self, env: dict = environ):
+        """ Read the configuration from the environment
+        """
+        self.session_name = env.get('SESSION_NAME')
+        self.session_duration = env.get('SESSION_DURATION')
+        self.session_capacity = int(env.get('SESSION_CAPACITY', '100000'))
+        self.session_per_user_limit = int(
+            env.get('SESSION_PER_USER_LIMIT', '0'))
+        self.session_stripes = int(env.get('SESSION_STRIPES', '16'))
+        self.session_sliding = env.get('SESSION_SLIDING', '').lower() in (
+            '1', 'true', 'yes')
+        self.session_refresh_window = int(
+            env.get('SESSION_REFRESH_WINDOW', '60'))
+
+
+CONFIG = Config()
+
+
+def reload_config() -> Config:
+    """ Take a new snapshot of the environment configuration
+    """
+    global CONFIG
+    CONFIG = Config()
+    return CONFIG
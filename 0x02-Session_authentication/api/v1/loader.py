@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+""" Startup loader module
+
+Discovers every model class and loads their stores concurrently, then
+signals readiness. Progress is kept for the `/api/v1/status` endpoint.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from models.base import Base
+import threading
+import time
+
+
+READY = threading.Event()
+_PROGRESS = {}
+_PROGRESS_LOCK = threading.Lock()
+_STARTED = threading.Lock()
+_DEFERRED = threading.Event()
+
+
+def model_classes() -> List[type]:
+    """ Return all the model classes inheriting from Base
+    """
+    import models.user
+    import models.user_session
+
+    classes = []
+    stack = list(Base.__subclasses__())
+    while stack:
+        cls = stack.pop()
+        if cls not in classes:
+            classes.append(cls)
+            stack.extend(cls.__subclasses__())
+    return classes
+
+
+def _load_one(cls: type):
+    """ Load the store of one model class and record its progress
+    """
+    name = cls.__name__
+    start = time.monotonic()
+    with _PROGRESS_LOCK:
+        _PROGRESS["models"][name] = {"state": "loading"}
+    try:
+        cls.load_from_file()
+        state = {"state": "loaded", "count": cls.count()}
+    except Exception as e:
+        state = {"state": "failed", "error": str(e)}
+    state["duration"] = round(time.monotonic() - start, 6)
+    with _PROGRESS_LOCK:
+        _PROGRESS["models"][name] = state
+
+
+def load_models() -> dict:
+    """ Load the stores of all model classes concurrently
+
+    Block until every store is loaded, set READY and return the progress.
+    """
+    classes = model_classes()
+    start = time.monotonic()
+    with _PROGRESS_LOCK:
+        _PROGRESS.clear()
+        _PROGRESS.update({
+            "total": len(classes),
+            "models": {cls.__name__: {"state": "pending"}
+                       for cls in classes},
+        })
+    with ThreadPoolExecutor(max_workers=max(1, len(classes))) as executor:
+        list(executor.map(_load_one, classes))
+    with _PROGRESS_LOCK:
+        _PROGRESS["duration"] = round(time.monotonic() - start, 6)
+    READY.set()
+    return progress()
+
+
+def start_loading():
+    """ Load all the model stores in a background thread, once
+
+    Does nothing once loading is deferred to load_models_once().
+    """
+    if _DEFERRED.is_set() or not _STARTED.acquire(blocking=False):
+        return
+    thread = threading.Thread(target=load_models, name="model-loader",
+                              daemon=True)
+    thread.start()
+
+
+def defer_loading():
+    """ Keep start_loading() from loading the stores: the caller loads
+    them itself with load_models_once()
+    """
+    _DEFERRED.set()
+
+
+def load_models_once() -> dict:
+    """ Load all the model stores in the calling thread, unless they are
+    already being loaded, and wait for them
+
+    Return the progress.
+    """
+    if _STARTED.acquire(blocking=False):
+        return load_models()
+    wait_ready()
+    return progress()
+
+
+def wait_ready(timeout: float = None) -> bool:
+    """ Wait for the model stores to be loaded
+    """
+    return READY.wait(timeout)
+
+
+def progress() -> dict:
+    """ Return the loading progress of the model stores
+    """
+    with _PROGRESS_LOCK:
+        models = {name: dict(state)
+                  for name, state in _PROGRESS.get("models", {}).items()}
+        loaded = len([state for state in models.values()
+                      if state["state"] in ("loaded", "failed")])
+        return {
+            "ready": READY.is_set(),
+            "loaded": loaded,
+            "total": _PROGRESS.get("total", 0),
+            "duration": _PROGRESS.get("duration"),
+            "models": models,
+        }
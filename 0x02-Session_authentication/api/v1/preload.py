@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+""" Preload module for pre-fork servers
+
+Loads every model store in the master process and freezes the loaded
+objects out of the garbage collector, so forked workers keep sharing
+those memory pages copy-on-write instead of each dirtying its own copy.
+
+Usage as a gunicorn configuration:
+    $ gunicorn -c python:api.v1.preload api.v1.app:app
+"""
+import gc
+from typing import List
+from api.v1 import loader
+
+
+preload_app = True
+# Number of requests served by a worker between two memory reports
+MEMORY_REPORT_INTERVAL = 1000
+
+# gunicorn reads this configuration before importing the app: importing
+# the app must not start the background loader, preload_models() loads
+# the stores itself
+loader.defer_loading()
+
+
+def preload_models() -> List[str]:
+    """ Load all model stores with the GC disabled and freeze them out
+    of the GC
+
+    Return the names of the loaded classes. The stores are loaded in the
+    calling thread (unless the app already started loading them, in
+    which case this waits for them), so no loading thread is alive when
+    the workers are forked.
+    """
+    gc.disable()
+    try:
+        names = list(loader.load_models_once()["models"])
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+    finally:
+        gc.enable()
+    return names
+
+
+def memory_usage() -> dict:
+    """ Return the shared and private memory of this process in kB
+
+    Read from /proc/self/smaps_rollup, None if it isn't available.
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    usage[parts[0].rstrip(':')] = int(parts[1])
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss": usage.get('Rss', 0),
+        "pss": usage.get('Pss', 0),
+        "shared": usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0),
+        "private": (usage.get('Private_Clean', 0) +
+                    usage.get('Private_Dirty', 0)),
+    }
+
+
+def when_ready(server):
+    """ gunicorn hook: preload the models in the master before forking
+    """
+    names = preload_models()
+    server.log.info("Preloaded models: {}".format(", ".join(names)))
+
+
+def post_request(worker, req, environ, resp):
+    """ gunicorn hook: report the memory of a worker every
+    MEMORY_REPORT_INTERVAL requests served, once its pages have diverged
+    from the master's
+    """
+    worker.requests_served = getattr(worker, 'requests_served', 0) + 1
+    if worker.requests_served % MEMORY_REPORT_INTERVAL == 0:
+        worker.log.info("Worker {} memory (kB) after {} requests: {}".format(
+            worker.pid, worker.requests_served, memory_usage()))
+
+
+def worker_exit(server, worker):
+    """ gunicorn hook: report the memory of a worker before it exits
+    """
+    server.log.info("Worker {} memory (kB) after {} requests: {}".format(
+        worker.pid, getattr(worker, 'requests_served', 0), memory_usage()))
+
+
+if __name__ == "__main__":
+    print("Preloaded models: {}".format(", ".join(preload_models())))
+    print("Memory (kB): {}".format(memory_usage()))
@@ -8,6 +8,7 @@ app_views = Blueprint("app_views", __name__, url_prefix="/api/v1")
 from api.v1.views.index import *
 from api.v1.views.users import *
 from api.v1.views.session_auth import *
+from api.v1.loader import start_loading
 
 
-User.load_from_file()
+start_loading()
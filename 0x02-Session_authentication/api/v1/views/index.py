@@ -3,15 +3,20 @@
 """
 from flask import jsonify, abort
 from api.v1.views import app_views
+from api.v1 import loader
 
 
 @app_views.route('/status', methods=['GET'], strict_slashes=False)
 def status() -> str:
     """ GET /api/v1/status
     Return:
-      - the status of the API
+      - the status of the API and the loading progress of the models
+      - 503 while the models are still loading
     """
-    return jsonify({"status": "OK"})
+    progress = loader.progress()
+    if not progress["ready"]:
+        return jsonify({"status": "LOADING", "loading": progress}), 503
+    return jsonify({"status": "OK", "loading": progress})
 
 
 @app_views.route('/stats/', strict_slashes=False)
@@ -19,10 +24,18 @@ def stats() -> str:
     """ GET /api/v1/stats
     Return:
       - the number of each objects
+      - the calls, hits and latency of each authentication scheme when
+        several are chained
+      - the number of live and expired sessions with session expiration
     """
     from models.user import User
+    from api.v1.app import auth
     stats = {}
     stats['users'] = User.count()
+    if hasattr(auth, 'scheme_stats'):
+        stats['auth'] = auth.scheme_stats()
+    if hasattr(auth, 'session_stats'):
+        stats['sessions'] = auth.session_stats()
     return jsonify(stats)
 
 
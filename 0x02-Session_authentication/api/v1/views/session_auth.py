@@ -4,7 +4,7 @@
 from flask import jsonify, request, abort
 from models.user import User
 from api.v1.views import app_views
-from os import getenv
+from api.v1 import config
 
 
 @app_views.route('/auth_session/login', methods=[
@@ -46,7 +46,7 @@ def login():
     response = jsonify(user.to_json())
 
     # Set session cookie in the response
-    session_name = getenv("SESSION_NAME")
+    session_name = config.CONFIG.session_name
     response.set_cookie(session_name, session_id)
 
     return response
@@ -2,34 +2,243 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from datetime import datetime
+from flask import (
+    abort,
+    jsonify,
+    request,
+    url_for,
+    make_response,
+    Response,
+    current_app
+)
+from models.base import naive_utc
 from models.user import User
+import hashlib
+
+
+FEED_LIMIT = 100
+FEED_MAX_LIMIT = 1000
+PAGE_LIMIT = 100
+PAGE_MAX_LIMIT = 1000
+STREAM_CHUNK = 100
+BATCH_MAX_SIZE = 1000
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - updated_since (optional): ISO timestamp, returns the change feed
+      - limit, cursor (optional): returns one page of users
+      - stream (optional): streams the list instead of building it
+      - fields (optional): comma-separated attributes to return
     Return:
       - list of all User objects JSON represented
+      - the change feed if `updated_since` is given
+      - a page `{"users": [...], "next": url}` if `limit` or `cursor`
+        is given
+      - 304 if the `If-None-Match` ETag is still current
     """
-    all_users = [user.to_json() for user in User.all()]
+    etag = representation_etag(User.collection_etag())
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    response = make_response(list_users())
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
+
+
+def list_users() -> str:
+    """ Build the response of GET /api/v1/users for its query parameters
+    """
+    if request.args.get('updated_since') is not None:
+        return view_users_changes()
+    if request.args.get('limit') is not None or \
+            request.args.get('cursor') is not None:
+        return view_users_page()
+    fields = requested_fields()
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return Response(stream_users(User.iterate(), current_app.json.dumps,
+                                     fields),
+                        mimetype=current_app.json.mimetype)
+    all_users = [user.to_json(fields=fields) for user in User.all()]
     return jsonify(all_users)
 
 
+def representation_etag(tag: str) -> str:
+    """ Return the ETag of a resource for the query parameters of the
+    request, which select its representation
+    """
+    if len(request.query_string) == 0:
+        return tag
+    tag = "{}?{}".format(tag, request.query_string.decode())
+    return hashlib.sha1(tag.encode()).hexdigest()
+
+
+def not_modified(etag: str, last_modified: datetime = None) -> Response:
+    """ Return a 304 response if the client copy is still current,
+    checked before any serialization, None otherwise
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and \
+            request.if_modified_since is not None:
+        since = request.if_modified_since.replace(tzinfo=None)
+        fresh = last_modified.replace(microsecond=0) <= since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def view_user(user: User) -> Response:
+    """ Respond with one user, or 304 if the client copy is current
+    """
+    etag = representation_etag(user.etag())
+    response = not_modified(etag, user.updated_at)
+    if response is None:
+        response = jsonify(user.to_json(fields=requested_fields()))
+        response.set_etag(etag)
+        response.last_modified = user.updated_at
+    return response
+
+
+def requested_fields() -> list:
+    """ Return the attributes listed in the `fields` query parameter,
+    or None to return them all
+    """
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+
+def stream_users(users, dumps, fields: list = None) -> str:
+    """ Yield a JSON array of users in chunks of STREAM_CHUNK users
+
+    `dumps` is bound by the view: the generator runs after the request
+    context is gone.
+    """
+    chunk = []
+    sep = "["
+    for user in users:
+        chunk.append(sep + dumps(user.to_json(fields=fields)))
+        sep = ","
+        if len(chunk) >= STREAM_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("[]" if sep == "[" else "]")
+    yield "".join(chunk)
+
+
+def view_users_page() -> str:
+    """ GET /api/v1/users?limit=<n>&cursor=<cursor>
+    Return:
+      - `users`: at most `limit` users in ID order, after `cursor`
+      - `next`: URL of the following page, null on the last page
+      - 400 if a parameter is invalid
+    """
+    try:
+        limit = int(request.args.get('limit', PAGE_LIMIT))
+    except ValueError:
+        return jsonify({'error': "Wrong format"}), 400
+    limit = max(1, min(limit, PAGE_MAX_LIMIT))
+    cursor = request.args.get('cursor') or None
+    fields = requested_fields()
+
+    users = list(User.iterate(limit=limit, after_id=cursor))
+    next_url = None
+    if len(users) == limit:
+        next_url = url_for('app_views.view_all_users',
+                           cursor=users[-1].id, limit=limit,
+                           fields=request.args.get('fields'))
+    return jsonify({"users": [user.to_json(fields=fields) for user in users],
+                    "next": next_url})
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ Parse an ISO 8601 timestamp, with an optional `Z` or UTC offset,
+    into a naive UTC datetime; raise ValueError if it is invalid
+    """
+    if value[-1:] in ('Z', 'z'):
+        value = value[:-1] + '+00:00'
+    return naive_utc(datetime.fromisoformat(value))
+
+
+def view_users_changes() -> str:
+    """ GET /api/v1/users?updated_since=<ts>&cursor=<cursor>&limit=<n>
+    Return:
+      - users changed or removed since `updated_since` (or after
+        `cursor`), oldest change first, removals as tombstones
+      - `cursor`: position to resume polling from on the next call
+      - `next`: URL of the following page, null when up to date
+      - `resync`: true if some removals are no longer known and the
+        consumer must fetch the full list again
+      - 400 if a parameter is invalid
+    """
+    try:
+        since = parse_timestamp(request.args.get('updated_since'))
+        after = None
+        cursor = request.args.get('cursor')
+        if cursor:
+            stamp, obj_id = cursor.split('_', 1)
+            after = (parse_timestamp(stamp), obj_id)
+        limit = int(request.args.get('limit', FEED_LIMIT))
+    except ValueError:
+        return jsonify({'error': "Wrong format"}), 400
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+    fields = requested_fields()
+
+    changes, complete = User.changes(since=since, after=after, limit=limit)
+    result = []
+    for stamp, obj_id, user in changes:
+        change = {
+            "id": obj_id,
+            "updated_at": stamp.isoformat(),
+            "deleted": user is None,
+        }
+        if user is not None:
+            change["user"] = user.to_json(fields=fields)
+        result.append(change)
+
+    next_url = None
+    if len(changes) > 0:
+        stamp, obj_id, _ = changes[-1]
+        cursor = "{}_{}".format(stamp.isoformat(), obj_id)
+    if len(changes) == limit:
+        next_url = url_for('app_views.view_all_users',
+                           updated_since=request.args.get('updated_since'),
+                           cursor=cursor, limit=limit,
+                           fields=request.args.get('fields'))
+    return jsonify({"changes": result, "cursor": cursor or None,
+                    "next": next_url, "resync": not complete})
+
+
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
 def view_one_user(user_id: str = None) -> str:
     """ GET /api/v1/users/:id or GET /api/v1/users/me
     Path parameter:
       - User ID or 'me'
+    Query parameter:
+      - fields (optional): comma-separated attributes to return
     Return:
       - User object JSON represented
+      - 304 if the `If-None-Match` ETag or `If-Modified-Since` date is
+        still current
       - 404 if the User ID doesn't exist or if user is not authenticated
     """
     if user_id == "me":
         # If 'me' is provided, return the current authenticated user
         if request.current_user is None:
             abort(404)
-        return jsonify(request.current_user.to_json()), 200
+        return view_user(request.current_user)
 
     # Original behavior for retrieving user by ID
     if user_id is None:
@@ -37,7 +246,7 @@ def view_one_user(user_id: str = None) -> str:
     user = User.get(user_id)
     if user is None:
         abort(404)
-    return jsonify(user.to_json()), 200
+    return view_user(user)
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
@@ -55,6 +264,10 @@ def delete_user(user_id: str = None) -> str:
     if user is None:
         abort(404)
     user.remove()
+    # Revoke the sessions of the deleted user (avoid circular import)
+    from api.v1.app import auth
+    if hasattr(auth, 'destroy_all_sessions'):
+        auth.destroy_all_sessions(user_id)
     return jsonify({}), 200
 
 
@@ -96,6 +309,66 @@ def create_user() -> str:
     return jsonify({'error': error_msg}), 400
 
 
+@app_views.route('/users/batch', methods=['POST'], strict_slashes=False)
+def create_users_batch() -> str:
+    """ POST /api/v1/users/batch
+    JSON body:
+      - list of users, each with:
+        - email
+        - password
+        - last_name (optional)
+        - first_name (optional)
+    Return:
+      - list of results in the order of the body, each one with the
+        `status` of the item (201 or 400) and the `user` created or the
+        `error`; all the valid users are saved with one write
+      - 400 if the body isn't a list of at most BATCH_MAX_SIZE items
+    """
+    rj = None
+    try:
+        rj = request.get_json()
+    except Exception as e:
+        rj = None
+    if type(rj) is not list:
+        return jsonify({'error': "Wrong format"}), 400
+    if len(rj) > BATCH_MAX_SIZE:
+        return jsonify({'error': "Too many users"}), 400
+
+    results = []
+    users = []
+    for item in rj:
+        error_msg = None
+        if type(item) is not dict:
+            error_msg = "Wrong format"
+        if error_msg is None and item.get("email", "") == "":
+            error_msg = "email missing"
+        if error_msg is None and item.get("password", "") == "":
+            error_msg = "password missing"
+        if error_msg is not None:
+            results.append({'status': 400, 'error': error_msg})
+            continue
+        user = User()
+        user.email = item.get("email")
+        user.password = item.get("password")
+        user.first_name = item.get("first_name")
+        user.last_name = item.get("last_name")
+        users.append(user)
+        results.append({'status': 201, 'user': user})
+
+    try:
+        User.save_many(users)
+    except Exception as e:
+        error_msg = "Can't create User: {}".format(e)
+        for result in results:
+            if result['status'] == 201:
+                result.pop('user')
+                result.update({'status': 400, 'error': error_msg})
+    for result in results:
+        if 'user' in result:
+            result['user'] = result['user'].to_json()
+    return jsonify(results), 200
+
+
 @app_views.route('/users/<user_id>', methods=['PUT'], strict_slashes=False)
 def update_user(user_id: str = None) -> str:
     """ PUT /api/v1/users/:id
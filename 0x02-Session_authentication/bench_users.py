@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+""" Benchmark of GET /api/v1/users with the default and the fast JSON
+providers, on in-memory users stored in a temporary directory
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+USERS = int(os.getenv('BENCH_USERS', '10000'))
+ROUNDS = int(os.getenv('BENCH_ROUNDS', '20'))
+
+
+def main():
+    """ Run the benchmark
+
+    The API is imported once in the temporary directory, which it loads
+    its storage files from.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp())
+
+    from flask.json.provider import DefaultJSONProvider
+    from api.v1 import loader
+    from api.v1.app import app
+    from api.v1.json_provider import FastJSONProvider, orjson
+    from models.user import User
+
+    loader.wait_ready()
+    User.save_many([User(email="user{}@hbtn.io".format(i),
+                         first_name="Bob", last_name="Dylan")
+                    for i in range(USERS)])
+    client = app.test_client()
+    print("{} users, {} rounds, orjson: {}".format(
+        USERS, ROUNDS, "yes" if orjson is not None else "no"))
+    for provider in (DefaultJSONProvider, FastJSONProvider):
+        app.json = provider(app)
+        client.get('/api/v1/users')
+        seconds = timeit.timeit(lambda: client.get('/api/v1/users'),
+                                number=ROUNDS)
+        print("{}: {:.2f} ms/request".format(provider.__name__,
+                                             seconds * 1000 / ROUNDS))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,293 @@
 #!/usr/bin/env python3
 """ Base module
 """
-from datetime import datetime
-from typing import TypeVar, List, Iterable
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import datetime, timezone
+from typing import TypeVar, List, Iterable, Iterator, Tuple
 from os import path
+import hashlib
+import hmac
+import io
 import json
+import os
+import pickle
+import threading
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# Stored timestamps keep the microseconds the change feed orders by
+STORE_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
 DATA = {}
+LOCKS = {}
+ORDER = {}
+JOURNAL_SIZE = {}
+JOURNAL_COMPACT_MIN = 1000
+FEEDS = {}
+INDEXES = {}
+TOMBSTONE_LIMIT = 10000
+GENERATIONS = {}
+# Distinguishes the generation counters of this process from others'
+STORE_EPOCH = uuid.uuid4().hex[:12]
+# Secret authenticating the warm-start snapshots, which are disabled
+# without one
+SNAPSHOT_KEY = os.environ.get('MODELS_SNAPSHOT_KEY')
+_MISSING = object()
+_LOCKS_GUARD = threading.Lock()
+
+
+def _renew_store_epoch():
+    """ Give a forked worker its own epoch: its generation counters,
+    inherited from the parent, then move apart from the parent's ones
+    """
+    global STORE_EPOCH
+    STORE_EPOCH = uuid.uuid4().hex[:12]
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_renew_store_epoch)
+
+
+def class_lock(s_class: str) -> threading.RLock:
+    """ Return the writer lock of a model class
+
+    Writers of a class are serialized on this lock. Each `DATA[s_class]`
+    dictionary is never mutated once published: writers build a new
+    dictionary and swap it in, so readers iterate their own consistent
+    snapshot without taking any lock.
+    """
+    lock = LOCKS.get(s_class)
+    if lock is None:
+        with _LOCKS_GUARD:
+            lock = LOCKS.setdefault(s_class, threading.RLock())
+    return lock
+
+
+def naive_utc(value: datetime) -> datetime:
+    """ Return a datetime as a naive UTC datetime, like the timestamps of
+    the models; naive datetimes are returned as is
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """ Parse a stored timestamp, with or without microseconds
+    """
+    try:
+        return datetime.strptime(value, STORE_TIMESTAMP_FORMAT)
+    except ValueError:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _publish(s_class: str, objs: dict, added: Iterable[str] = (),
+             removed: Iterable[str] = ()):
+    """ Swap in a new snapshot of a model class and its ordered IDs
+
+    Must be called with the writer lock of the class held.
+    """
+    GENERATIONS[s_class] = GENERATIONS.get(s_class, 0) + 1
+    cached = ORDER.pop(s_class, None)
+    if cached is not None and cached[0] is DATA.get(s_class):
+        ids = list(cached[1])
+        for obj_id in removed:
+            i = bisect_left(ids, obj_id)
+            if i < len(ids) and ids[i] == obj_id:
+                del ids[i]
+        for obj_id in added:
+            insort(ids, obj_id)
+        ORDER[s_class] = (objs, ids)
+    DATA[s_class] = objs
+
+
+class ChangeFeed():
+    """ Index of the objects of a class ordered by `updated_at`
+
+    Each entry is an `(updated_at, id, removed)` tuple; removals are kept
+    as tombstones stamped with their removal time, up to TOMBSTONE_LIMIT.
+    An entry is current while `latest` maps its ID to it: entries
+    superseded by a later change are skipped by readers, and dropped
+    once they outnumber the current ones. `entries` is only appended to
+    or replaced, so readers bisect a consistent list without locking;
+    writers hold the writer lock of the class. Removals older than
+    `horizon` are unknown to the feed.
+    """
+
+    def __init__(self, objs: dict):
+        """ Build the index of a snapshot of objects
+
+        Tombstones are kept in memory only: the removals done before the
+        index is built (e.g. before a restart) are unknown, so the
+        horizon starts at the build time.
+        """
+        self.entries = sorted((obj.updated_at, obj.id, False)
+                              for obj in objs.values())
+        self.latest = {entry[1]: entry for entry in self.entries}
+        self.tombstones = deque()
+        self.stale = 0
+        self.horizon = datetime.utcnow()
+
+    def is_current(self, entry: tuple) -> bool:
+        """ Check if an entry is the latest change of its object
+        """
+        return self.latest.get(entry[1]) is entry
+
+    def record(self, changed: Iterable[TypeVar('Base')] = (),
+               removed: Iterable[str] = (), now: datetime = None):
+        """ Append the new stamps of saved objects and the tombstones
+
+        Amortized O(changes): the entries are only rebuilt once the
+        superseded ones outnumber the current ones, or in the rare case
+        of a stamp older than the last one (the clock went back).
+        """
+        new_entries = [(obj.updated_at, obj.id, False) for obj in changed]
+        new_entries += [(now, obj_id, True) for obj_id in removed]
+        new_entries.sort()
+        for entry in new_entries:
+            if entry[1] in self.latest:
+                self.stale += 1
+            self.latest[entry[1]] = entry
+            if entry[2]:
+                self.tombstones.append(entry)
+        while len(self.tombstones) > TOMBSTONE_LIMIT:
+            entry = self.tombstones.popleft()
+            if self.is_current(entry):
+                del self.latest[entry[1]]
+                self.stale += 1
+            self.horizon = entry[0]
+        if self.stale > len(self.latest) or (
+                new_entries and self.entries and
+                new_entries[0] < self.entries[-1]):
+            self.entries = sorted(entry for entry in
+                                  self.entries + new_entries
+                                  if self.is_current(entry))
+            self.stale = 0
+        else:
+            self.entries.extend(new_entries)
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """ Unpickler of warm-start snapshots, only building model objects
+    and datetimes
+    """
+
+    def find_class(self, module: str, name: str):
+        """ Return a class allowed in snapshots, refuse any other
+        """
+        if (module == 'datetime' and name == 'datetime') or \
+                module.startswith('models.'):
+            cls = super().find_class(module, name)
+            if cls is datetime or (isinstance(cls, type) and
+                                   issubclass(cls, Base)):
+                return cls
+        raise pickle.UnpicklingError(
+            "{}.{} is not allowed in a snapshot".format(module, name))
+
+
+class AttributeIndex():
+    """ Index of the objects of a class by the values of some attributes
+
+    `ids[attribute][value]` is the tuple of the IDs of the objects having
+    that value. Tuples are replaced, never mutated, so readers look up a
+    consistent tuple without locking; writers hold the writer lock of the
+    class. Recording a change costs O(objects sharing its values).
+    """
+
+    def __init__(self, attributes: Iterable[str], objs: dict):
+        """ Build the index of a snapshot of objects
+        """
+        self.attributes = tuple(attributes)
+        self.ids = {attribute: {} for attribute in self.attributes}
+        # Object ID -> its indexed values, to unlink them on change
+        self.values = {}
+        self.record(changed=objs.values())
+
+    def record(self, changed: Iterable[TypeVar('Base')] = (),
+               removed: Iterable[str] = ()):
+        """ Move saved objects to their current values and drop removed
+        ones
+        """
+        for obj in changed:
+            values = tuple(getattr(obj, attribute, None)
+                           for attribute in self.attributes)
+            old = self.values.get(obj.id)
+            if old == values:
+                continue
+            if old is not None:
+                self._unlink(obj.id, old)
+            self._link(obj.id, values)
+            self.values[obj.id] = values
+        for obj_id in removed:
+            old = self.values.pop(obj_id, None)
+            if old is not None:
+                self._unlink(obj_id, old)
+
+    def lookup(self, attribute: str, value) -> tuple:
+        """ Return the IDs of the objects with a value of an attribute
+        """
+        return self.ids[attribute].get(value, ())
+
+    def _link(self, obj_id: str, values: tuple):
+        """ Add an object ID under its values
+        """
+        for attribute, value in zip(self.attributes, values):
+            index = self.ids[attribute]
+            index[value] = index.get(value, ()) + (obj_id,)
+
+    def _unlink(self, obj_id: str, values: tuple):
+        """ Remove an object ID from under its values
+        """
+        for attribute, value in zip(self.attributes, values):
+            index = self.ids[attribute]
+            ids = tuple(i for i in index.get(value, ()) if i != obj_id)
+            if ids:
+                index[value] = ids
+            else:
+                index.pop(value, None)
+
+
+def _read_source(file_path: str) -> Tuple[tuple, bytes]:
+    """ Read a storage file
+
+    Return its snapshot key (path, size, mtime and content hash) and its
+    content, or a key without stats and None if the file doesn't exist.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            content = f.read()
+    except FileNotFoundError:
+        return (file_path, None, None, None), None
+    digest = hashlib.sha256(content).hexdigest()
+    return (file_path, stat.st_size, stat.st_mtime_ns, digest), content
 
 
 class Base():
     """ Base class
     """
 
+    # Bookkeeping attributes never serialized nor invalidating the cache
+    _transient = frozenset(['_json_cache', '_dirty'])
+    # Attributes looked up through an AttributeIndex by `search`
+    _indexed_attributes = ()
+    # Keep a ChangeFeed of the class for `changes`
+    _change_feed = False
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
         s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
+        DATA.setdefault(s_class, {})
 
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            self.created_at = _parse_timestamp(kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            self.updated_at = _parse_timestamp(kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
@@ -44,69 +300,367 @@ class Base():
             return False
         return (self.id == other.id)
 
-    def to_json(self, for_serialization: bool = False) -> dict:
+    def __setattr__(self, name: str, value):
+        """ Set an attribute, mark it dirty if its stored value changed
+        and drop the cached JSON dictionaries
+        """
+        if name in self._transient:
+            super().__setattr__(name, value)
+            return
+        # Properties (e.g. User.password) store under another name
+        # through a nested __setattr__, which records that one instead
+        old = self.__dict__.get(name, _MISSING)
+        super().__setattr__(name, value)
+        new = self.__dict__.get(name, _MISSING)
+        if new is not _MISSING and (old is _MISSING or old != new):
+            self.__dict__.setdefault('_dirty', set()).add(name)
+        self.__dict__.pop('_json_cache', None)
+
+    def etag(self) -> str:
+        """ Return an entity tag of the object, changing on every save
+        """
+        tag = "{}|{}".format(self.id, self.updated_at.isoformat())
+        return hashlib.sha1(tag.encode()).hexdigest()
+
+    @classmethod
+    def collection_etag(cls) -> str:
+        """ Return an entity tag of all the objects of the class,
+        changing on every save or removal
+        """
+        s_class = cls.__name__
+        return "{}-{}-{}".format(STORE_EPOCH, s_class,
+                                 GENERATIONS.get(s_class, 0))
+
+    def dirty_fields(self) -> List[str]:
+        """ Return the attributes changed since the last save or load
+        """
+        return sorted(self.__dict__.get('_dirty', ()))
+
+    def to_json(self, for_serialization: bool = False,
+                fields: Iterable[str] = None) -> dict:
         """ Convert the object a JSON dictionary
+
+        The result is cached until an attribute is assigned, so repeated
+        calls on an unchanged object skip all the formatting work.
+        `fields` restricts the result to these attributes; without a
+        cached result only those are formatted. Timestamps formatted for
+        serialization keep their microseconds.
+        """
+        cache = self.__dict__.get('_json_cache')
+        if cache is None:
+            cache = {}
+            self.__dict__['_json_cache'] = cache
+        result = cache.get(for_serialization)
+        if result is not None:
+            if fields is None:
+                return dict(result)
+            return {key: result[key] for key in fields if key in result}
+        if fields is not None:
+            return self._serialize(for_serialization, fields)
+        result = self._serialize(for_serialization,
+                                 list(self.__dict__.keys()))
+        cache[for_serialization] = result
+        return dict(result)
+
+    def _serialize(self, for_serialization: bool,
+                   fields: Iterable[str]) -> dict:
+        """ Format the given attributes into a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        attributes = self.__dict__
+        for key in fields:
+            if key in self._transient or key not in attributes:
+                continue
             if not for_serialization and key[0] == '_':
                 continue
+            value = attributes[key]
             if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
+                result[key] = value.strftime(STORE_TIMESTAMP_FORMAT
+                                             if for_serialization
+                                             else TIMESTAMP_FORMAT)
             else:
                 result[key] = value
         return result
 
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from file, then replay the journal
+
+        The built objects are kept in a warm-start snapshot, reused as is
+        by the next load while the file and the journal are unchanged.
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        journal_source = _read_source(cls._journal_path())
+        if journal_source[1] is not None and \
+                journal_source[1][-1:] not in (b"", b"\n"):
+            cls._truncate_journal(journal_source[1])
+            journal_source = _read_source(cls._journal_path())
+        sources = [_read_source(file_path), journal_source]
+        key = [source[0] for source in sources]
+        snapshot = cls._load_snapshot(key)
+        if snapshot is not None:
+            objs, journal_size = snapshot
+        else:
+            content, journal = sources[0][1], sources[1][1]
+            objs_json = {} if content is None else json.loads(content)
+            journal_size = 0
+            if journal is not None:
+                journal_size = cls._replay_journal(
+                    objs_json, journal.decode().splitlines())
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
+            objs = {}
             for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+                obj = cls(**obj_json)
+                obj.__dict__.pop('_dirty', None)
+                objs[obj_id] = obj
+            cls._save_snapshot(key, objs, journal_size)
+
+        with class_lock(s_class):
+            JOURNAL_SIZE[s_class] = journal_size
+            FEEDS.pop(s_class, None)
+            INDEXES.pop(s_class, None)
+            # The loaded objects are unrelated to the cached ordered IDs
+            ORDER.pop(s_class, None)
+            _publish(s_class, objs)
 
     @classmethod
     def save_to_file(cls):
-        """ Save all objects to file
+        """ Save all objects to file and truncate the journal
         """
         s_class = cls.__name__
         file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        with class_lock(s_class):
+            objs_json = {}
+            for obj_id, obj in DATA.get(s_class, {}).items():
+                objs_json[obj_id] = obj.to_json(True)
+
+            tmp_path = "{}.tmp".format(file_path)
+            with open(tmp_path, 'w') as f:
+                json.dump(objs_json, f)
+            os.replace(tmp_path, file_path)
+            if path.exists(cls._journal_path()):
+                os.remove(cls._journal_path())
+            JOURNAL_SIZE[s_class] = 0
+
+    @classmethod
+    def _journal_path(cls) -> str:
+        """ Path of the append-only journal of changes of a class
+        """
+        return ".db_{}.log".format(cls.__name__)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def _truncate_journal(cls, journal: bytes):
+        """ Cut the torn last line (crash during an append) off the
+        journal, so that the next append starts on a line of its own
+        """
+        with class_lock(cls.__name__):
+            with open(cls._journal_path(), 'r+b') as f:
+                f.truncate(journal.rfind(b"\n") + 1)
+
+    @classmethod
+    def _replay_journal(cls, objs_json: dict, lines: List[str]) -> int:
+        """ Apply the journal entries on top of loaded JSON objects
+
+        Return the number of entries read. Unreadable lines are skipped.
+        """
+        count = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            count += 1
+            obj_id = entry.get('id')
+            if entry.get('removed'):
+                objs_json.pop(obj_id, None)
+            else:
+                objs_json.setdefault(obj_id, {}).update(
+                    entry.get('fields', {}))
+        return count
+
+    @classmethod
+    def _snapshot_path(cls) -> str:
+        """ Path of the warm-start snapshot of a class
+        """
+        return ".db_{}.pickle".format(cls.__name__)
+
+    @staticmethod
+    def _snapshot_digest(payload: bytes) -> bytes:
+        """ Return the HMAC of a snapshot payload under SNAPSHOT_KEY
+        """
+        return hmac.new(SNAPSHOT_KEY.encode(), payload,
+                        hashlib.sha256).digest()
+
+    @classmethod
+    def _load_snapshot(cls, key: list) -> Tuple[dict, int]:
+        """ Return the objects and journal size of the warm-start
+        snapshot, or None if it is disabled, missing, unreadable, stale
+        or not authenticated by SNAPSHOT_KEY
+
+        The payload is only unpickled once its HMAC is verified.
+        """
+        if not SNAPSHOT_KEY:
+            return None
+        try:
+            with open(cls._snapshot_path(), 'rb') as f:
+                digest = f.read(hashlib.sha256().digest_size)
+                payload = f.read()
+        except OSError:
+            return None
+        if not hmac.compare_digest(digest, cls._snapshot_digest(payload)):
+            return None
+        try:
+            f = io.BytesIO(payload)
+            if _SnapshotUnpickler(f).load() != key:
+                return None
+            return _SnapshotUnpickler(f).load()
+        except Exception:
+            return None
+
+    @classmethod
+    def _save_snapshot(cls, key: list, objs: dict, journal_size: int):
+        """ Write the warm-start snapshot of freshly loaded objects,
+        preceded by its HMAC
+        """
+        if not SNAPSHOT_KEY:
+            return
+        snapshot_path = cls._snapshot_path()
+        tmp_path = "{}.tmp".format(snapshot_path)
+        try:
+            payload = pickle.dumps(key, pickle.HIGHEST_PROTOCOL) + \
+                pickle.dumps((objs, journal_size), pickle.HIGHEST_PROTOCOL)
+            with open(tmp_path, 'wb') as f:
+                f.write(cls._snapshot_digest(payload))
+                f.write(payload)
+            os.replace(tmp_path, snapshot_path)
+        except Exception:
+            pass
+
+    @classmethod
+    def _persist(cls, entries: List[dict]):
+        """ Persist changes of objects of a class
+
+        Each entry holds an `id` and either the changed `fields` or
+        `removed`. Entries are appended to the journal; the journal is
+        compacted into the JSON file once it outgrows the store, which
+        keeps writes amortized O(changed fields).
+        """
+        if len(entries) == 0:
+            return
+        s_class = cls.__name__
+        with class_lock(s_class):
+            size = JOURNAL_SIZE.get(s_class, 0) + len(entries)
+            if size > max(JOURNAL_COMPACT_MIN, cls.count()):
+                cls.save_to_file()
+                return
+            with open(cls._journal_path(), 'a') as f:
+                f.write("".join(json.dumps(e) + "\n" for e in entries))
+            JOURNAL_SIZE[s_class] = size
+
+    def _pending_change(self, is_new: bool, now: datetime) -> dict:
+        """ Build the journal entry of a save and reset the dirty set
+
+        Return None if a stored object has no changes to persist.
+        Must be called with the writer lock of the class held.
+        """
+        if not is_new and not self.__dict__.get('_dirty'):
+            return None
+        self.updated_at = now
+        fields = self.to_json(True)
+        if not is_new:
+            dirty = self.__dict__['_dirty']
+            fields = {k: v for k, v in fields.items() if k in dirty}
+        self.__dict__.pop('_dirty', None)
+        return {'id': self.id, 'fields': fields}
 
     def save(self):
         """ Save current object
+
+        Only the attributes changed since the last save are persisted;
+        saving an unchanged object already stored is a no-op.
         """
-        s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        self.__class__.save_many([self])
 
     def remove(self):
         """ Remove object
         """
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        self.__class__.remove_many([self.id])
+
+    @classmethod
+    def save_many(cls, objs: Iterable[TypeVar('Base')]) -> int:
+        """ Save many objects of the class at once
+
+        All objects are applied in memory, published as one snapshot and
+        persisted with one write. Return the number of objects written.
+        """
+        s_class = cls.__name__
+        with class_lock(s_class):
+            feed = cls._feed()
+            index = cls._attribute_index()
+            current = DATA.get(s_class, {})
+            new_objs = None
+            added = []
+            changed = []
+            entries = []
+            now = datetime.utcnow()
+            for obj in objs:
+                stored = current if new_objs is None else new_objs
+                is_new = stored.get(obj.id) is not obj
+                entry = obj._pending_change(is_new, now)
+                if entry is None:
+                    continue
+                if is_new:
+                    if new_objs is None:
+                        new_objs = dict(current)
+                    if obj.id not in new_objs:
+                        added.append(obj.id)
+                    new_objs[obj.id] = obj
+                changed.append(obj)
+                entries.append(entry)
+            if new_objs is not None:
+                _publish(s_class, new_objs, added=added)
+            elif len(entries) > 0:
+                GENERATIONS[s_class] = GENERATIONS.get(s_class, 0) + 1
+            if feed is not None:
+                feed.record(changed=changed)
+            if index is not None:
+                index.record(changed=changed)
+            cls._persist(entries)
+            return len(entries)
+
+    @classmethod
+    def remove_many(cls, ids: Iterable[str]) -> int:
+        """ Remove many objects of the class by ID at once
+
+        Return the number of objects removed.
+        """
+        s_class = cls.__name__
+        with class_lock(s_class):
+            feed = cls._feed()
+            index = cls._attribute_index()
+            current = DATA.get(s_class, {})
+            removed = [obj_id for obj_id in set(ids) if obj_id in current]
+            if len(removed) == 0:
+                return 0
+            new_objs = dict(current)
+            for obj_id in removed:
+                del new_objs[obj_id]
+            _publish(s_class, new_objs, removed=removed)
+            if feed is not None:
+                feed.record(removed=removed, now=datetime.utcnow())
+            if index is not None:
+                index.record(removed=removed)
+            cls._persist([{'id': obj_id, 'removed': True}
+                          for obj_id in removed])
+            return len(removed)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
         s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return len(DATA.get(s_class, {}))
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -119,19 +673,147 @@ class Base():
         """ Return one object by ID
         """
         s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return DATA.get(s_class, {}).get(id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        With an indexed attribute, only the objects having its value are
+        checked.
         """
         s_class = cls.__name__
+        objs = DATA.get(s_class, {})
+        candidates = objs.values()
+        index = cls._attribute_index()
+        if index is not None:
+            for key in attributes:
+                if key in index.attributes:
+                    candidates = [objs[obj_id] for obj_id in
+                                  index.lookup(key, attributes[key])
+                                  if obj_id in objs]
+                    break
+
         def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+            return cls._matches(obj, attributes)
+
+        return list(filter(_search, candidates))
+
+    @classmethod
+    def iterate(cls, attributes: dict = {}, limit: int = None,
+                after_id: str = None) -> Iterator[TypeVar('Base')]:
+        """ Lazily iterate objects with matching attributes
+
+        Objects are yielded in ID order from one consistent snapshot,
+        starting right after `after_id` (a cursor: the ID of the last
+        object previously seen) and stopping after `limit` objects.
+        """
+        objs, ids = cls._ordered_ids()
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        count = 0
+        for i in range(start, len(ids)):
+            if limit is not None and count >= limit:
+                return
+            obj = objs[ids[i]]
+            if cls._matches(obj, attributes):
+                count += 1
+                yield obj
+
+    @classmethod
+    def changes(cls, since: datetime = None, after: tuple = None,
+                limit: int = None) -> Tuple[list, bool]:
+        """ Return the objects changed or removed since a time
+
+        Changes are `(updated_at, id, obj)` tuples in `updated_at` order,
+        with `obj` None for a removal. `after` is a cursor: the
+        `(updated_at, id)` of the last change previously seen. The flag
+        is False when removals since the requested time may be unknown
+        (tombstones dropped, or removals done before the feed was built
+        such as before a restart), in which case the caller must resync
+        from a full listing. Only classes with `_change_feed` set keep
+        the feed.
+        """
+        feed = cls._feed()
+        if feed is None:
+            raise TypeError("{} has no change feed".format(cls.__name__))
+        since = naive_utc(since)
+        if after is not None:
+            after = (naive_utc(after[0]), after[1])
+        entries = feed.entries
+        objs = DATA.get(cls.__name__, {})
+        if after is not None:
+            start = bisect_right(entries, (after[0], after[1], True))
+        elif since is not None:
+            start = bisect_left(entries, (since,))
+        else:
+            start = 0
+        result = []
+        for i in range(start, len(entries)):
+            if limit is not None and len(result) >= limit:
+                break
+            stamp, obj_id, removed = entry = entries[i]
+            # Entries superseded by a later change are skipped
+            if not feed.is_current(entry):
+                continue
+            result.append((stamp, obj_id, None if removed else
+                           objs.get(obj_id)))
+        stamp = after[0] if after is not None else since
+        complete = stamp is not None and stamp > feed.horizon
+        return result, complete
+
+    @classmethod
+    def _feed(cls) -> ChangeFeed:
+        """ Return the change feed of the class, built on first use,
+        or None if the class doesn't keep one
+        """
+        if not cls._change_feed:
+            return None
+        s_class = cls.__name__
+        feed = FEEDS.get(s_class)
+        if feed is None:
+            with class_lock(s_class):
+                feed = FEEDS.get(s_class)
+                if feed is None:
+                    feed = ChangeFeed(DATA.get(s_class, {}))
+                    FEEDS[s_class] = feed
+        return feed
+
+    @classmethod
+    def _attribute_index(cls) -> AttributeIndex:
+        """ Return the attribute index of the class, built on first use,
+        or None if the class has no indexed attributes
+        """
+        if len(cls._indexed_attributes) == 0:
+            return None
+        s_class = cls.__name__
+        index = INDEXES.get(s_class)
+        if index is None:
+            with class_lock(s_class):
+                index = INDEXES.get(s_class)
+                if index is None:
+                    index = AttributeIndex(cls._indexed_attributes,
+                                           DATA.get(s_class, {}))
+                    INDEXES[s_class] = index
+        return index
+
+    @classmethod
+    def _ordered_ids(cls) -> Tuple[dict, List[str]]:
+        """ Return the current snapshot with its IDs sorted
+        """
+        s_class = cls.__name__
+        objs = DATA.get(s_class, {})
+        cached = ORDER.get(s_class)
+        if cached is not None and cached[0] is objs:
+            return cached
+        cached = (objs, sorted(objs))
+        ORDER[s_class] = cached
+        return cached
+
+    @staticmethod
+    def _matches(obj: TypeVar('Base'), attributes: dict) -> bool:
+        """ Check if an object has all the given attribute values
+        """
+        for k, v in attributes.items():
+            if (getattr(obj, k) != v):
+                return False
+        return True
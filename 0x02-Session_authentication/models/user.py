@@ -9,6 +9,9 @@ class User(Base):
     """ User class
     """
 
+    # Consumers poll the users changed through `changes`
+    _change_feed = True
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
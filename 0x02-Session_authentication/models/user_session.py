@@ -2,14 +2,31 @@
 """This Module creates a persistence class to store all session IDs """
 
 from models.base import Base
+from typing import List
 
 
 class UserSession(Base):
     """The UserSession class to store user session info"""
 
+    # Sessions are looked up by session ID and by user
+    _indexed_attributes = ('session_id', 'user_id')
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a UserSession instance
         """
         super().__init__(*args, **kwargs)
         self.user_id = kwargs.get('user_id')
         self.session_id = kwargs.get('session_id')
+
+    @classmethod
+    def get_by_session_id(cls, session_id: str) -> 'UserSession':
+        """ Return the stored session of a session ID, or None
+        """
+        user_sessions = cls.search({'session_id': session_id})
+        return user_sessions[0] if user_sessions else None
+
+    @classmethod
+    def search_by_user_id(cls, user_id: str) -> List['UserSession']:
+        """ Return the stored sessions of a user
+        """
+        return cls.search({'user_id': user_id})
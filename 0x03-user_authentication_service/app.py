@@ -11,9 +11,11 @@ from flask import (
     redirect
 )
 from auth import Auth
+from json_provider import FastJSONProvider
 
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # Instantiate the Auth object
 AUTH = Auth()